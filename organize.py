@@ -1,16 +1,31 @@
 import os
 import re
+import errno
+import hashlib
 import shutil
 import yaml
 import json
 import sys
 import argparse
 import logging
+import functools
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Prefer the LibYAML-backed C loader/dumper, fall back to the pure Python ones
+try:
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Organize Obsidian vault based on tags")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
-    return parser.parse_args()
+    parser.add_argument("--jobs", type=int, help="Number of threads reading notes (default: min(20, 4 x CPUs))")
+    args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return args
 
 args = parse_args()
 
@@ -22,7 +37,7 @@ logging.basicConfig(
 
 # Load configuration from YAML file
 with open('config.yaml', 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+    config = yaml.load(f, Loader=_Loader)
 
 # Assign configuration to variables
 VAULT_ROOT = config['vault_root']
@@ -31,7 +46,33 @@ CATEGORY_RULES = config['category_rules']
 SUBCATEGORY_RULES = config['subcategory_rules']
 TAG_CONSOLIDATION = config['tag_consolidation']
 
-YAML_FRONTMATTER_REGEX = re.compile(r"(?s)^---\n(.*?)\n---\n")
+# Tags that consolidation rules rewrite into something else
+REPLACED_KEYS = frozenset(k for k, v in TAG_CONSOLIDATION.items() if k != v)
+
+# Generated index notes live here, the walker never descends into SKIP_FOLDERS
+INDEX_FOLDER = "_indexes"
+
+def build_skip_folders(skip_folders):
+    """Folder names the walker never enters, from the optional skip_folders config value"""
+    if skip_folders is None:
+        skip_folders = []
+    elif isinstance(skip_folders, str):
+        # A single folder name, not a sequence of one-letter names
+        skip_folders = [skip_folders]
+    elif not isinstance(skip_folders, list):
+        raise ValueError(f"skip_folders must be a folder name or a list of them, got {skip_folders!r}")
+    return frozenset({INDEX_FOLDER, *(str(name) for name in skip_folders)})
+
+SKIP_FOLDERS = build_skip_folders(config.get('skip_folders'))
+
+# Per-note results of the last run, notes whose mtime and size are unchanged are not re-read
+STATE_FILENAME = ".vault_state.json"
+
+# Frontmatter is read in chunks of this many characters until its closing delimiter
+FRONTMATTER_CHUNK_SIZE = 4096
+
+# Notes are read and classified in parallel, the work is mostly file I/O
+MAX_WORKERS = min(20, (os.cpu_count() or 1) * 4)
 
 def flatten_subcategory_order(subcategory_rules):
     ordered_tags = []
@@ -53,6 +94,10 @@ def flatten_subcategory_order(subcategory_rules):
     return ordered_tags
 
 SUBCATEGORY_ORDER = flatten_subcategory_order(SUBCATEGORY_RULES)
+# Reverse index: tag -> position of its first occurrence in SUBCATEGORY_ORDER
+SUBCATEGORY_RANK = {}
+for index, tag in enumerate(SUBCATEGORY_ORDER):
+    SUBCATEGORY_RANK.setdefault(tag, index)
 
 def build_subcategory_paths(subcategory_rules, category_rules):
     flat_map = {}
@@ -79,42 +124,228 @@ def build_subcategory_paths(subcategory_rules, category_rules):
 
     return flat_map
 
-# Reverse lookup: folder name (like "6_Lore") -> tag (like "lore")
+# Reverse lookup: folder name (like "6_Lore") -> tag (like "lore"), last key wins on shared folders
 FOLDER_TO_CATEGORY = {v.lower(): k.lower() for k, v in CATEGORY_RULES.items()}
 # Build flat map once
 SUBCATEGORY_PATHS = build_subcategory_paths(SUBCATEGORY_RULES, CATEGORY_RULES)
 
+def build_subcategory_parent_tags(subcategory_rules, category_rules, folder_to_category):
+    """Map each subcategory tag to the parent tags it implies, top level first"""
+    parent_tags = {}
+
+    def walk(parents, node):
+        if isinstance(node, list):
+            for item in node:
+                walk(parents, item)
+        elif isinstance(node, dict):
+            for key, val in node.items():
+                parent_tags[key.lower()] = parents
+                walk(parents + (key.lower(),), val)
+        elif isinstance(node, str):
+            parent_tags[node.lower()] = parents
+
+    for cat_key, branches in subcategory_rules.items():
+        main_folder = category_rules.get(cat_key, cat_key)
+        top_level_tag = folder_to_category.get(main_folder.lower())
+        walk((top_level_tag,) if top_level_tag else (), branches)
+
+    return parent_tags
+
+# Parent tags per subcategory tag, e.g. "cities" -> ("locations", "settlements")
+SUBCATEGORY_PARENT_TAGS = build_subcategory_parent_tags(
+    SUBCATEGORY_RULES, CATEGORY_RULES, FOLDER_TO_CATEGORY
+)
+
+def build_subcategory_paths_by_main(subcategory_paths, main_folders):
+    """Map each main folder (lowercased) to its [(tag, sub_path)], best candidate first
+
+    Deeper paths come first, ties go to the earliest tag in SUBCATEGORY_ORDER.
+    """
+    ranked = sorted(
+        subcategory_paths.items(),
+        key=lambda item: (-item[1].count("/"), SUBCATEGORY_RANK.get(item[0], 1_000_000))
+    )
+
+    by_main = {}
+    for main_folder in main_folders:
+        main_folder_lower = main_folder.lower()
+        by_main[main_folder_lower] = [
+            (tag, sub_path) for tag, sub_path in ranked
+            if sub_path.lower().startswith(main_folder_lower)
+        ]
+    return by_main
+
+# Subfolder candidates per main folder, so classification takes the first tag it has
+SUBCATEGORY_PATHS_BY_MAIN = build_subcategory_paths_by_main(
+    SUBCATEGORY_PATHS, [*CATEGORY_RULES.values(), DEFAULT_FOLDER]
+)
+
+def build_config_fingerprint(default_folder, category_rules, subcategory_rules, tag_consolidation):
+    """Hash the classification rules, keeping key order since the first match wins"""
+    rules = json.dumps(
+        [default_folder, category_rules, subcategory_rules, tag_consolidation],
+        default=str
+    )
+    return hashlib.sha256(rules.encode("utf-8")).hexdigest()
+
+# Cached classifications are only valid for the rules that produced them
+CONFIG_FINGERPRINT = build_config_fingerprint(
+    DEFAULT_FOLDER, CATEGORY_RULES, SUBCATEGORY_RULES, TAG_CONSOLIDATION
+)
+
+# Lowercased category key -> (position in config, main folder), the earliest key wins
+CATEGORY_RANK = {}
+for index, (key, folder) in enumerate(CATEGORY_RULES.items()):
+    CATEGORY_RANK.setdefault(key.lower(), (index, folder))
+
 # === FUNCTIONS ===
 
-def normalize_tags(tags):
-    return [t.lower() for t in tags if isinstance(t, str)]
+def clean_tags(raw_tags):
+    """Validate a frontmatter tags value once, returns its string tags as a list"""
+    if isinstance(raw_tags, str):
+        return [raw_tags]
+    if not isinstance(raw_tags, list):
+        return []
+    return [t for t in raw_tags if isinstance(t, str)]
 
-def parse_yaml_frontmatter(filepath):
+def normalize_tags(tags):
+    # Expects tags already passed through clean_tags. Interned so the same tag
+    # across notes shares one string and dict/set probes hit on identity.
+    return [sys.intern(t.lower()) for t in tags]
+
+@functools.lru_cache(maxsize=4096)
+def _load_frontmatter_yaml(raw_yaml):
+    # Identical frontmatter blocks are common across notes, so parse each one once.
+    # The returned dict is shared between callers and must not be mutated.
+    return yaml.load(raw_yaml, Loader=_Loader) or {}
+
+def find_frontmatter(content):
+    """Locate the frontmatter block, returns (yaml_start, yaml_end, body_start) or None
+
+    The block is a leading "---" line up to the first closing "---" line.
+    """
+    if not content.startswith("---\n"):
+        return None
+    end = content.find("\n---\n", 4)
+    return (4, end, end + 5) if end != -1 else None
+
+def read_note_head(filepath):
+    """Read a note up to the end of its frontmatter block
+
+    Returns (raw_yaml, content). raw_yaml is None if there is no frontmatter, content
+    is the whole note when the read happened to reach the end of it and None otherwise.
+    """
+    with open(filepath, encoding="utf-8") as f:
+        head = f.read(FRONTMATTER_CHUNK_SIZE)
+        # Text mode only returns a short read at the end of the file
+        at_eof = len(head) < FRONTMATTER_CHUNK_SIZE
+        if not head.startswith("---\n"):
+            return None, head if at_eof else None
+
+        end = head.find("\n---\n", 4)
+        while end == -1:
+            chunk = f.read(FRONTMATTER_CHUNK_SIZE)
+            if not chunk:
+                return None, head
+            at_eof = len(chunk) < FRONTMATTER_CHUNK_SIZE
+            # The delimiter may straddle the chunk boundary
+            search_from = max(4, len(head) - 4)
+            head += chunk
+            end = head.find("\n---\n", search_from)
+
+    return head[4:end], head if at_eof else None
+
+def load_frontmatter(filepath):
+    """Return (yaml_data, content), content is the full note if reading the frontmatter covered it"""
     try:
-        with open(filepath, encoding="utf-8") as f:
-            content = f.read()
+        raw_yaml, content = read_note_head(filepath)
     except Exception as e:
         logging.warn(f"⚠️ Failed to read {filepath}: {e}")
-        return {}
+        return {}, None
 
-    match = YAML_FRONTMATTER_REGEX.match(content)
-    if not match:
-        return {}
+    if raw_yaml is None:
+        return {}, content
 
     try:
-        return yaml.safe_load(match.group(1)) or {}
+        yaml_data = _load_frontmatter_yaml(raw_yaml)
     except Exception as e:
         logging.warn(f"⚠️ YAML parse error in {filepath}: {e}")
-        return {}
+        return {}, content
+
+    if not isinstance(yaml_data, dict):
+        logging.warn(f"⚠️ Frontmatter in {filepath} is not a mapping, ignoring it")
+        return {}, content
+    return yaml_data, content
+
+# Strings the dumper writes unquoted, minus the words YAML would read back as bools or null
+PLAIN_SCALAR_REGEX = re.compile(r"[A-Za-z_][A-Za-z0-9_-]{0,79}")
+NON_PLAIN_WORDS = frozenset({"y", "n", "yes", "no", "on", "off", "true", "false", "null"})
+
+def _is_plain_scalar(value):
+    return (
+        type(value) is str
+        and PLAIN_SCALAR_REGEX.fullmatch(value) is not None
+        and value.lower() not in NON_PLAIN_WORDS
+    )
+
+def emit_frontmatter(data):
+    """Serialize flat frontmatter exactly like yaml.dump, None when it needs the real dumper
+
+    Handles the usual note schema of plain string values and lists of plain strings.
+    """
+    if not data:
+        return None
+
+    lines = []
+    for key, value in data.items():
+        if not _is_plain_scalar(key):
+            return None
+        if type(value) is list:
+            if not value:
+                lines.append(f"{key}: []")
+            elif all(_is_plain_scalar(item) for item in value):
+                lines.append(f"{key}:")
+                lines.extend(f"- {item}" for item in value)
+            else:
+                return None
+        elif _is_plain_scalar(value):
+            lines.append(f"{key}: {value}")
+        else:
+            return None
+
+    return "\n".join(lines)
+
+def overwrite_header(filepath, old_header, new_header):
+    """Swap the start of a file in place when both headers encode to the same size
+
+    Returns False, without writing, if the sizes differ or the file does not start with old_header.
+    """
+    old_bytes = old_header.encode("utf-8")
+    new_bytes = new_header.encode("utf-8")
+    if len(old_bytes) != len(new_bytes):
+        return False
 
-def write_yaml_frontmatter(filepath, data, original_content):
-    new_yaml = yaml.safe_dump(data, sort_keys=False).strip()
+    with open(filepath, "r+b") as f:
+        # Guards against newline translation and edits made since the note was read
+        if f.read(len(old_bytes)) != old_bytes:
+            return False
+        f.seek(0)
+        f.write(new_bytes)
+    return True
 
-    if YAML_FRONTMATTER_REGEX.search(original_content):
-        # Replace existing frontmatter
-        def replacer(match):
-            return f"---\n{new_yaml}\n---\n"
-        new_content = YAML_FRONTMATTER_REGEX.sub(replacer, original_content, count=1)
+def write_yaml_frontmatter(filepath, data, original_content):
+    new_yaml = emit_frontmatter(data)
+    if new_yaml is None:
+        new_yaml = yaml.dump(data, Dumper=_Dumper, sort_keys=False).strip()
+
+    span = find_frontmatter(original_content)
+    if span:
+        # Replace existing frontmatter, leaving the body on disk untouched if the size allows
+        body_start = span[2]
+        new_header = f"---\n{new_yaml}\n---\n"
+        if overwrite_header(filepath, original_content[:body_start], new_header):
+            return
+        new_content = new_header + original_content[body_start:]
     else:
         # No frontmatter exists, prepend new frontmatter block
         new_content = f"---\n{new_yaml}\n---\n\n{original_content}"
@@ -124,85 +355,76 @@ def write_yaml_frontmatter(filepath, data, original_content):
 
 def consolidate_tags(tags):
     """Apply all tag consolidation rules and remove replaced tags"""
-    consolidated = []
-    replaced_tags = set()
-
-    for input_tag in tags:
-        replacement = TAG_CONSOLIDATION.get(input_tag, input_tag)
-        if replacement not in consolidated:
-            consolidated.append(replacement)
-        if replacement != input_tag:
-            replaced_tags.add(input_tag)
-
-    # Remove replaced tags from consolidated list if they are still there
-    final_tags = [tag for tag in consolidated if tag not in replaced_tags]
-    return final_tags
+    # Only tags present in the input count as replaced, so chained rules keep their targets
+    replaced_tags = REPLACED_KEYS.intersection(tags)
+    # Dict keys keep first-seen order with O(1) membership
+    consolidated = dict.fromkeys(TAG_CONSOLIDATION.get(tag, tag) for tag in tags)
+    return [tag for tag in consolidated if tag not in replaced_tags]
 
 def add_parent_tags_for_subcategories(tags):
     tags_set = set(tags)
     added_tags = False
 
     for tag in tags:
-        path = SUBCATEGORY_PATHS.get(tag)
-        if not path:
-            continue
-
-        parts = path.split("/")
-        top_level_folder = parts[0].lower()
-        top_level_tag = FOLDER_TO_CATEGORY.get(top_level_folder)
-
-        # Add top level tag if missing, append at the end
-        if top_level_tag and top_level_tag not in tags_set:
-            tags.append(top_level_tag)
-            tags_set.add(top_level_tag)
-            added_tags = True
-
-        # Add intermediate parts if missing, append at the end
-        for part in parts[1:-1]:
-            normalized_part = part.lower()
-            if normalized_part not in tags_set:
-                tags.append(normalized_part)
-                tags_set.add(normalized_part)
+        # Add missing top level and intermediate tags, append at the end
+        for parent_tag in SUBCATEGORY_PARENT_TAGS.get(tag, ()):
+            if parent_tag not in tags_set:
+                tags.append(parent_tag)
+                tags_set.add(parent_tag)
                 added_tags = True
 
     return tags, added_tags
 
 def classify_file(yaml_data):
-    tags = yaml_data.get("tags") or []
+    main_folder, subfolder, tags, _ = classify_tags(normalize_tags(clean_tags(yaml_data.get("tags"))))
+    return main_folder, subfolder, tags
 
-    tags = normalize_tags(tags)
+def classify_tags(tags):
+    """Classify already normalized tags, returns (main_folder, subfolder, tags, tag_set)"""
+    main_folder, subfolder, updated_tags, tag_set = _classify_cached(tuple(tags))
+    return main_folder, subfolder, list(updated_tags), tag_set
+
+@functools.lru_cache(maxsize=4096)
+def _classify_cached(tags):
+    # Many notes share a tag list and the rules are fixed for the run. Keyed on the
+    # ordered tuple rather than a set, the output tag order depends on the input order.
     tags = consolidate_tags(tags)
 
     tags, _ = add_parent_tags_for_subcategories(tags)
+    tag_set = set(tags)
 
-    matching_main_keys = [key for key in CATEGORY_RULES if key.lower() in tags]
+    # Probe only the note's own tags, the lowest config position decides the main folder
+    matches = [CATEGORY_RANK[tag] for tag in tag_set if tag in CATEGORY_RANK]
+    main_folder = min(matches)[1] if matches else DEFAULT_FOLDER
 
-    if not matching_main_keys:
-        main_folder = DEFAULT_FOLDER
-    else:
-        main_folder = CATEGORY_RULES[matching_main_keys[0]]
+    # Candidates are pre-sorted, deepest first then SUBCATEGORY_ORDER, so the first hit wins
+    subfolder = next(
+        (sub_path for tag, sub_path in SUBCATEGORY_PATHS_BY_MAIN[main_folder.lower()] if tag in tag_set),
+        None
+    )
 
-    candidate_subfolders = []
+    return main_folder, subfolder, tuple(tags), frozenset(tag_set)
 
-    for tag in tags:
-        sub_path = SUBCATEGORY_PATHS.get(tag)
-        if sub_path and sub_path.lower().startswith(main_folder.lower()):
-            depth = sub_path.count("/")
-            order_index = SUBCATEGORY_ORDER.index(tag) if tag in SUBCATEGORY_ORDER else 1_000_000
-            candidate_subfolders.append((depth, order_index, sub_path))
-
-    if candidate_subfolders:
-        # Sort by descending depth, then ascending order_index
-        candidate_subfolders.sort(key=lambda x: (-x[0], x[1]))
-        subfolder = candidate_subfolders[0][2]
-    else:
-        subfolder = None
+# Folders already created during the current run, so makedirs runs once per folder
+_ensured_dirs = set()
 
-    return main_folder, subfolder, tags
+def ensure_dir(path):
+    if path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
+
+def rename_file(src, dst):
+    # A single rename on the same filesystem, copy and delete only across devices
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
 
 def move_file(filepath, dest_folder, vault_root):
     dest_path_folder = os.path.join(vault_root, dest_folder)
-    os.makedirs(dest_path_folder, exist_ok=True)
+    ensure_dir(dest_path_folder)
 
     filename = os.path.basename(filepath)
     dest_path = os.path.join(dest_path_folder, filename)
@@ -211,112 +433,243 @@ def move_file(filepath, dest_folder, vault_root):
         raise FileExistsError(f"❌ File already exists at destination: {dest_path}")
 
     logging.debug(f"📁 Moving '{filename}' to '{dest_folder}/'")
-    shutil.move(filepath, dest_path)
-    return dest_path
-
-def update_tags_in_file(filepath, new_tags):
     try:
-        with open(filepath, encoding="utf-8") as f:
-            content = f.read()
-    except Exception as e:
-        logging.warn(f"⚠️ Failed to read {filepath} for updating tags: {e}")
-        return False
-
-    match = YAML_FRONTMATTER_REGEX.match(content)
-    if match:
-        yaml_data = yaml.safe_load(match.group(1)) or {}
-    else:
-        yaml_data = {}
+        rename_file(filepath, dest_path)
+    except FileNotFoundError:
+        if not os.path.exists(filepath):
+            raise
+        # The folder was removed after it was cached, create it again
+        _ensured_dirs.discard(dest_path_folder)
+        ensure_dir(dest_path_folder)
+        rename_file(filepath, dest_path)
+    return dest_path
 
+def update_tags_in_file(filepath, new_tags, content=None, span=None, yaml_data=None):
+    """Rewrite a note's tags, yaml_data skips re-parsing frontmatter the caller already has"""
+    if content is None:
+        try:
+            with open(filepath, encoding="utf-8") as f:
+                content = f.read()
+        except Exception as e:
+            logging.warn(f"⚠️ Failed to read {filepath} for updating tags: {e}")
+            return False
+
+    if span is None:
+        span = find_frontmatter(content)
+
+    if yaml_data is None:
+        yaml_data = _load_frontmatter_yaml(content[span[0]:span[1]]) if span else {}
+
+    # Nothing to write if the note already has these tags
+    current_tags = frozenset(normalize_tags(clean_tags(yaml_data.get("tags"))))
+    if current_tags == frozenset(normalize_tags(new_tags)):
+        return True
+
+    # Copy, the parsed frontmatter is shared through the cache
+    yaml_data = dict(yaml_data)
     yaml_data['tags'] = new_tags
     write_yaml_frontmatter(filepath, yaml_data, content)
     logging.debug(f"📝 Updated tags in '{filepath}'")
     return True
 
 def update_indexes(tag_to_files_map, vault_root):
-    index_dir = os.path.join(vault_root, "_indexes")
-    os.makedirs(index_dir, exist_ok=True)
+    index_dir = os.path.join(vault_root, INDEX_FOLDER)
+    ensure_dir(index_dir)
 
-    # Get all current index files
-    current_index_files = {
-        os.path.splitext(f)[0].lower(): os.path.join(index_dir, f)
-        for f in os.listdir(index_dir)
-        if f.endswith(".md")
-    }
+    index_dir_sep = index_dir + os.sep
 
-    # Determine the tags we now care about (consolidated ones)
-    updated_tags = set(tag_to_files_map.keys())
+    # Get all current index files in one scan
+    with os.scandir(index_dir) as entries:
+        current_index_files = {
+            entry.name.lower(): entry
+            for entry in entries
+            if entry.name.endswith(".md")
+        }
+
+    # Determine the index files we now care about (consolidated tags)
+    updated_index_files = {f"_{tag}.md".lower() for tag in tag_to_files_map}
 
     # Remove obsolete index files
-    for tag, path in current_index_files.items():
-        if tag not in updated_tags:
-            os.remove(path)
-            logging.debug(f"🗑️ Removed obsolete index: {tag}.md")
+    for index_name, entry in current_index_files.items():
+        if index_name not in updated_index_files:
+            os.remove(entry.path)
+            logging.debug(f"🗑️ Removed obsolete index: {entry.name}")
 
     # Rebuild valid index files with proper tagging
     for tag, files in tag_to_files_map.items():
+        files.sort(key=os.path.basename)
+
         # Create content with tag reference
         lines = [f"# Index for #{tag}"]
+        lines += [f"- [[{os.path.splitext(os.path.basename(filepath))[0]}]]" for filepath in files]
+        content = "\n".join(lines).encode("utf-8")
+
+        existing = current_index_files.get(f"_{tag}.md".lower())
+        if existing is not None:
+            index_path = existing.path
+            # Leave the index alone if it already has this content. Comparing
+            # sizes first avoids opening and reading indexes that clearly changed.
+            if existing.stat().st_size == len(content):
+                with open(index_path, "rb") as f:
+                    if f.read() == content:
+                        continue
+        else:
+            index_path = f"{index_dir_sep}_{tag}.md"
+
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, index_path)
+        logging.debug(f"📄 Updated index for: {tag}")
 
-        for filepath in sorted(files):
-            note_name = os.path.splitext(os.path.basename(filepath))[0]
-            lines.append(f"- [[{note_name}]]")
+def iter_md_files(vault_root, skip=SKIP_FOLDERS):
+    """Yield the path of every markdown note in the vault, never entering folders named in skip"""
+    pending_dirs = deque([vault_root])
+
+    while pending_dirs:
+        current_dir = pending_dirs.popleft()
+
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    # DirEntry caches the file type, so these checks need no extra stat
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip:
+                            pending_dirs.append(entry.path)
+                    elif entry.name.endswith(".md") and entry.is_file(follow_symlinks=False):
+                        yield entry.path
+        except OSError as e:
+            logging.warn(f"⚠️ Failed to scan {current_dir}: {e}")
+
+def load_vault_state(vault_root):
+    """Return {relative_path: [mtime_ns, size, main_folder, subfolder, tags]} from the last run"""
+    state_path = os.path.join(vault_root, INDEX_FOLDER, STATE_FILENAME)
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logging.warn(f"⚠️ Ignoring unreadable state file {state_path}: {e}")
+        return {}
 
-        content = "\n".join(lines)
+    if not isinstance(state, dict) or state.get("config") != CONFIG_FINGERPRINT:
+        logging.debug("♻️ Configuration changed, reclassifying all notes")
+        return {}
+    return state.get("notes") or {}
 
-        index_path = os.path.join(index_dir, f"_{tag}.md")
-        with open(index_path, "w", encoding="utf-8") as f:
-            f.write(content)
-        logging.debug(f"📄 Updated index for: {tag}")
+def save_vault_state(vault_root, notes):
+    state_dir = os.path.join(vault_root, INDEX_FOLDER)
+    ensure_dir(state_dir)
+    state_path = os.path.join(state_dir, STATE_FILENAME)
+
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"config": CONFIG_FINGERPRINT, "notes": notes}, f)
+    os.replace(tmp_path, state_path)
+
+def classify_note(filepath):
+    """Read and classify a note without modifying anything on disk
 
-def organize_vault(vault_root):
+    Returns (filepath, main_folder, subfolder, updated_tags, frontmatter, content), where
+    frontmatter is the parsed YAML when the tags need rewriting and None otherwise, and
+    content is the full note if it was read while looking for the frontmatter.
+    """
+    yaml_data, content = load_frontmatter(filepath)
+
+    # Normalize once, classify_tags output is already lowercase
+    orig_tags_lower = normalize_tags(clean_tags(yaml_data.get("tags")))
+    main_folder, subfolder, updated_tags, updated_tag_set = classify_tags(orig_tags_lower)
+
+    if updated_tag_set == frozenset(orig_tags_lower):
+        return filepath, main_folder, subfolder, updated_tags, None, None
+    return filepath, main_folder, subfolder, updated_tags, yaml_data, content
+
+def organize_vault(vault_root, jobs=None):
     logging.info(f"🔎 Scanning vault: {vault_root}")
+    logging.debug(f"🧩 YAML backend: {_Loader.__name__}/{_Dumper.__name__}")
+
+    # Folders may have been removed since a previous run in this process
+    _ensured_dirs.clear()
+
+    tag_to_files_map = defaultdict(list)
+
+    # Note paths are built by scandir from vault_root, so slicing off this
+    # prefix gives the relative path without calling os.path.relpath
+    root_prefix = os.path.join(vault_root, "")
+
+    prev_state = load_vault_state(vault_root)
+    new_state = {}
+
+    def classify_or_reuse(filepath):
+        # Skip reading notes that have not changed since the last run
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return classify_note(filepath)
+
+        cached = prev_state.get(filepath[len(root_prefix):])
+        if cached and cached[:2] == [st.st_mtime_ns, st.st_size]:
+            _, _, main_folder, subfolder, tags = cached
+            return filepath, main_folder, subfolder, tags, None, None
 
-    tag_to_files_map = {}
+        return classify_note(filepath)
 
-    for root, _, files in os.walk(vault_root):
-        rel_root = os.path.relpath(root, vault_root)
-        if rel_root == ".":
-            rel_root = ""
+    def record_state(path, classification):
+        st = os.stat(path)
+        new_state[path[len(root_prefix):]] = [st.st_mtime_ns, st.st_size, *classification]
 
-        # Skip _indexes folder anywhere in path
-        if "_indexes" in rel_root.split(os.sep):
-            continue
+    # (target_folder, filepath, classification) for notes in the wrong folder
+    planned_moves = []
 
-        for filename in files:
-            if not filename.endswith(".md"):
-                continue
+    # Classification runs in worker threads, all file changes happen here one at a time
+    with ThreadPoolExecutor(max_workers=jobs or MAX_WORKERS) as executor:
+        results = executor.map(classify_or_reuse, iter_md_files(vault_root))
 
-            filepath = os.path.join(root, filename)
-            yaml_data = parse_yaml_frontmatter(filepath)
-            main_folder, subfolder, updated_tags = classify_file(yaml_data)
-            orig_tags = yaml_data.get("tags") or []
-            orig_tags_lower = normalize_tags(orig_tags)
-            updated_tags_lower = normalize_tags(updated_tags)
+        for filepath, main_folder, subfolder, updated_tags, frontmatter, content in results:
+            tags_written = True
+            if frontmatter is not None:
+                # Their YAML is already parsed, and short notes were already read in full
+                tags_written = update_tags_in_file(
+                    filepath, updated_tags, content=content, yaml_data=frontmatter
+                )
 
-            if set(updated_tags_lower) != set(orig_tags_lower):
-                update_tags_in_file(filepath, updated_tags)
+            for tag in updated_tags:
+                tag_to_files_map[tag].append(filepath)
 
-            for tag in updated_tags_lower:
-                tag_to_files_map.setdefault(tag, []).append(filepath)
+            # Failed tag rewrites are left out of the state and retried on the next run
+            classification = (main_folder, subfolder, updated_tags) if tags_written else None
 
             # Determine target folder relative to vault root
             target_folder = subfolder if subfolder else main_folder
             target_folder_norm = os.path.normpath(target_folder)
 
             # Current file folder relative to vault root
-            file_current_folder = os.path.relpath(root, vault_root)
+            file_current_folder = os.path.dirname(filepath)[len(root_prefix):] or "."
             file_current_folder_norm = os.path.normpath(file_current_folder)
 
             # Move if current folder is different from target folder
             if file_current_folder_norm.lower() != target_folder_norm.lower():
-                try:
-                    move_file(filepath, target_folder, vault_root)
-                except FileExistsError as e:
-                    logging.info(f"⚠️ Skipped moving due to existing file: {e}")
+                planned_moves.append((target_folder, filepath, classification))
+            elif classification:
+                record_state(filepath, classification)
+
+    # Moves run after the scan, grouped by destination so each folder is set up once.
+    # The sort is stable, so name clashes still go to the note found first.
+    planned_moves.sort(key=lambda move: move[0])
+    for target_folder, filepath, classification in planned_moves:
+        final_path = filepath
+        try:
+            final_path = move_file(filepath, target_folder, vault_root)
+        except FileExistsError as e:
+            logging.info(f"⚠️ Skipped moving due to existing file: {e}")
+
+        if classification:
+            record_state(final_path, classification)
 
     update_indexes(tag_to_files_map, vault_root)
+    save_vault_state(vault_root, new_state)
     logging.info("✅ Vault organization complete!")
 
 if __name__ == "__main__":
-    organize_vault(VAULT_ROOT)
+    organize_vault(VAULT_ROOT, jobs=args.jobs)
@@ -1,27 +1,51 @@
+import re
 import pytest
 import yaml
 import os
+import errno
 from organize import (
+    clean_tags,
     normalize_tags,
     consolidate_tags,
     add_parent_tags_for_subcategories,
     classify_file,
     build_subcategory_paths,
+    build_subcategory_parent_tags,
     flatten_subcategory_order,
     CATEGORY_RULES,
     SUBCATEGORY_RULES,
     TAG_CONSOLIDATION,
+    FOLDER_TO_CATEGORY,
+    DEFAULT_FOLDER,
+    emit_frontmatter,
+    find_frontmatter,
+    read_note_head,
+    iter_md_files,
+    build_skip_folders,
+    build_config_fingerprint,
+    load_vault_state,
+    move_file,
+    update_tags_in_file,
     organize_vault
 )
 
 def test_normalize_tags():
     assert normalize_tags(["Ruins", "CITIES", "LoRe"]) == ["ruins", "cities", "lore"]
 
+def test_clean_tags():
+    assert clean_tags(["lore", 3, None, "ruins"]) == ["lore", "ruins"]
+    assert clean_tags("lore") == ["lore"]
+    assert clean_tags(None) == []
+
 def test_consolidate_tags():
     original = ["towns_and_villages", "human_realms"]
     expected = ["towns", "nations"]
     assert consolidate_tags(original) == expected
 
+def test_consolidate_tags_matches_whole_tags_only():
+    # "forts" is a consolidation key, tags merely containing it are left alone
+    assert consolidate_tags(["forts-of-the-north", "forts"]) == ["forts-of-the-north", "fortifications"]
+
 def test_add_parent_tags_for_subcategories_adds_expected():
     tags = ["cities"]
     enriched_tags, added = add_parent_tags_for_subcategories(tags[:])
@@ -46,6 +70,16 @@ def test_build_subcategory_paths_contains_expected_paths():
     assert paths["cities"].endswith("Locations/Settlements/Cities")
     assert paths["ruins"].endswith("Locations/Ruins")
 
+def test_build_subcategory_parent_tags_lists_top_level_first():
+    parents = build_subcategory_parent_tags(SUBCATEGORY_RULES, CATEGORY_RULES, FOLDER_TO_CATEGORY)
+    assert parents["cities"] == ("locations", "settlements")
+    assert parents["ruins"] == ("locations",)
+
+def test_classify_file_uses_first_category_in_config_order():
+    # "locations" is listed before "lore" in category_rules
+    main, sub, tags = classify_file({"tags": ["lore", "locations"]})
+    assert main == CATEGORY_RULES["locations"]
+
 def test_classify_file_prefers_deeper_path():
     yaml_data = {"tags": ["ruins", "cities"]}
     main, sub, tags = classify_file(yaml_data)
@@ -59,6 +93,60 @@ def test_classify_file_prefers_earlier_if_same_depth():
         main, sub, tags = classify_file(yaml_data)
         assert sub.endswith("Locations/Ruins")
 
+# Reference definition of a frontmatter block that find_frontmatter must agree with
+YAML_FRONTMATTER_REGEX = re.compile(r"(?s)^---\n(.*?)\n---\n")
+
+@pytest.mark.parametrize("content", [
+    "---\ntags:\n- lore\n---\nbody",
+    "---\n\n---\n",
+    "---\n---\n",
+    "---\ntags: []\n---",
+    "no frontmatter\n---\nx\n---\n",
+])
+def test_find_frontmatter_matches_regex(content):
+    match = YAML_FRONTMATTER_REGEX.match(content)
+    expected = (match.start(1), match.end(1), match.end()) if match else None
+    assert find_frontmatter(content) == expected
+
+def test_read_note_head_spans_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr("organize.FRONTMATTER_CHUNK_SIZE", 8)
+    note = tmp_path / "note.md"
+    note.write_text("---\ntags:\n- ruins\n- cities\n---\n" + "body\n" * 100, encoding='utf-8')
+    raw_yaml, _ = read_note_head(str(note))
+    assert raw_yaml == "tags:\n- ruins\n- cities"
+
+def test_read_note_head_without_closing_delimiter(tmp_path, monkeypatch):
+    monkeypatch.setattr("organize.FRONTMATTER_CHUNK_SIZE", 8)
+    note = tmp_path / "note.md"
+    note.write_text("---\ntags:\n- ruins\n" + "body\n" * 10, encoding='utf-8')
+    raw_yaml, _ = read_note_head(str(note))
+    assert raw_yaml is None
+
+@pytest.mark.parametrize("data", [
+    {"tags": ["cities", "locations", "settlements"]},
+    {"title": "Dark_Wood", "tags": [], "aliases": ["dark-wood"]},
+])
+def test_emit_frontmatter_matches_yaml_dump(data):
+    assert emit_frontmatter(data) == yaml.safe_dump(data, sort_keys=False).strip()
+
+@pytest.mark.parametrize("data", [
+    {"tags": ["yes"]},
+    {"title": "The Dark Wood"},
+    {"tags": ["lore"], "year": 1204},
+])
+def test_emit_frontmatter_defers_to_dumper(data):
+    assert emit_frontmatter(data) is None
+
+def test_read_note_head_returns_short_notes_whole(tmp_path, monkeypatch):
+    monkeypatch.setattr("organize.FRONTMATTER_CHUNK_SIZE", 32)
+    short_note = tmp_path / "short.md"
+    short_note.write_text("---\ntags:\n- lore\n---\nbody", encoding='utf-8')
+    long_note = tmp_path / "long.md"
+    long_note.write_text("---\ntags:\n- lore\n---\n" + "body\n" * 20, encoding='utf-8')
+
+    assert read_note_head(str(short_note)) == ("tags:\n- lore", "---\ntags:\n- lore\n---\nbody")
+    assert read_note_head(str(long_note)) == ("tags:\n- lore", None)
+
 @pytest.fixture
 def sample_vault(tmp_path):
     # Create files with tags
@@ -78,3 +166,106 @@ def test_file_moves_correctly(sample_vault):
     assert (sample_vault / "2_Locations" / "Ruins" / "ruins_note.md").exists()
     assert (sample_vault / "2_Locations" / "Settlements" / "Cities" / "city_note.md").exists()
     assert (sample_vault / "6_Lore" / "basic_note.md").exists()
+
+def test_iter_md_files_skips_indexes(tmp_path):
+    (tmp_path / "_indexes").mkdir()
+    (tmp_path / "_indexes" / "_lore.md").write_text("# Index", encoding='utf-8')
+    (tmp_path / "6_Lore").mkdir()
+    (tmp_path / "6_Lore" / "note.md").write_text("body", encoding='utf-8')
+    (tmp_path / "image.png").write_text("", encoding='utf-8')
+
+    found = [os.path.relpath(p, tmp_path) for p in iter_md_files(str(tmp_path))]
+    assert found == [os.path.join("6_Lore", "note.md")]
+
+def test_build_skip_folders_accepts_a_single_name():
+    assert build_skip_folders("Templates") == {"_indexes", "Templates"}
+    assert build_skip_folders(["Templates", "Archive"]) == {"_indexes", "Templates", "Archive"}
+    assert build_skip_folders(None) == {"_indexes"}
+    with pytest.raises(ValueError):
+        build_skip_folders({"Templates": True})
+
+def test_iter_md_files_prunes_custom_skip_folders(tmp_path):
+    (tmp_path / "6_Lore" / "Templates").mkdir(parents=True)
+    (tmp_path / "6_Lore" / "Templates" / "template.md").write_text("body", encoding='utf-8')
+    (tmp_path / "6_Lore" / "note.md").write_text("body", encoding='utf-8')
+
+    found = [os.path.relpath(p, tmp_path) for p in iter_md_files(str(tmp_path), skip={"Templates"})]
+    assert found == [os.path.join("6_Lore", "note.md")]
+
+def test_unchanged_indexes_are_not_rewritten(sample_vault):
+    organize_vault(str(sample_vault))
+    index_path = sample_vault / "_indexes" / "_lore.md"
+    os.utime(index_path, ns=(0, 0))
+
+    organize_vault(str(sample_vault))
+
+    assert index_path.read_text(encoding='utf-8') == "# Index for #lore\n- [[basic_note]]"
+    assert index_path.stat().st_mtime_ns == 0
+
+def test_parent_tags_are_written_back(sample_vault):
+    organize_vault(str(sample_vault))
+
+    moved = sample_vault / "2_Locations" / "Settlements" / "Cities" / "city_note.md"
+    content = moved.read_text(encoding='utf-8')
+    assert content.startswith("---\ntags:\n- cities\n- locations\n- settlements\n---\n")
+    assert content.endswith("#city_note.md")
+
+def test_move_file_recreates_removed_destination(tmp_path):
+    note = tmp_path / "note.md"
+    note.write_text("body", encoding='utf-8')
+    move_file(str(note), "6_Lore", str(tmp_path))
+    (tmp_path / "6_Lore" / "note.md").rename(note)
+    (tmp_path / "6_Lore").rmdir()
+
+    move_file(str(note), "6_Lore", str(tmp_path))
+    assert (tmp_path / "6_Lore" / "note.md").exists()
+
+def test_unchanged_notes_are_not_reread(sample_vault, monkeypatch):
+    organize_vault(str(sample_vault))
+
+    def fail(filepath):
+        raise AssertionError(f"{filepath} should have been served from the state file")
+    monkeypatch.setattr("organize.read_note_head", fail)
+    organize_vault(str(sample_vault))
+
+    index = (sample_vault / "_indexes" / "_cities.md").read_text(encoding='utf-8')
+    assert index == "# Index for #cities\n- [[city_note]]"
+
+def test_same_size_frontmatter_is_rewritten_in_place(tmp_path):
+    # A full rewrite goes through text mode and would turn the CRLF body into LF
+    note = tmp_path / "note.md"
+    note.write_bytes(b"---\ntags:\n- towns\n---\nbody\r\nmore\r\n")
+
+    update_tags_in_file(str(note), ["seas_"])
+    assert note.read_bytes() == b"---\ntags:\n- seas_\n---\nbody\r\nmore\r\n"
+
+def test_resized_frontmatter_falls_back_to_full_rewrite(tmp_path):
+    note = tmp_path / "note.md"
+    note.write_text("---\ntags:\n- towns\n---\nbody", encoding='utf-8')
+
+    update_tags_in_file(str(note), ["lore", "ruins"])
+    assert note.read_text(encoding='utf-8') == "---\ntags:\n- lore\n- ruins\n---\nbody"
+
+def test_move_file_falls_back_to_copy_across_devices(tmp_path, monkeypatch):
+    note = tmp_path / "note.md"
+    note.write_text("body", encoding='utf-8')
+
+    def cross_device(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    monkeypatch.setattr("organize.os.replace", cross_device)
+
+    move_file(str(note), "6_Lore", str(tmp_path))
+    assert not note.exists()
+    assert (tmp_path / "6_Lore" / "note.md").read_text(encoding='utf-8') == "body"
+
+def test_reordered_category_rules_discard_state(sample_vault, monkeypatch):
+    organize_vault(str(sample_vault))
+    assert load_vault_state(str(sample_vault))
+
+    reordered = dict(reversed(list(CATEGORY_RULES.items())))
+    fingerprint = build_config_fingerprint(DEFAULT_FOLDER, reordered, SUBCATEGORY_RULES, TAG_CONSOLIDATION)
+    monkeypatch.setattr("organize.CONFIG_FINGERPRINT", fingerprint)
+    assert load_vault_state(str(sample_vault)) == {}
+
+def test_config_fingerprint_accepts_mixed_key_types():
+    assert build_config_fingerprint(DEFAULT_FOLDER, CATEGORY_RULES, SUBCATEGORY_RULES, {1204: "history", "forts": "fortifications"})